@@ -7,6 +7,130 @@ input data.
 import numpy as np
 
 
+# Scratch arrays reused across collate calls (see _get_buffer). DataLoader
+# workers are separate processes, so each worker owns its own pool; this is
+# not meant to be shared between threads.
+_SCRATCH = {}
+
+
+def _get_buffer(name, shape, dtype):
+    """
+    Returns a scratch array of the requested shape and dtype, reusing the
+    cached allocation whenever its capacity suffices. Batch sizes are stable
+    in steady state, so after a few iterations every call is a cache hit.
+
+    Only use this for intermediates that do not outlive a single collate
+    call; arrays returned to the caller must own their memory.
+
+    Parameters
+    ==========
+    name: str
+        Identifies the scratch slot.
+    shape: tuple
+    dtype: np.dtype
+
+    Returns
+    =======
+    np.ndarray
+    """
+    buf = _SCRATCH.get(name)
+    if buf is None or buf.dtype != dtype or buf.shape[1:] != shape[1:] \
+       or buf.shape[0] < shape[0]:
+        buf = np.empty(shape, dtype=dtype)
+        _SCRATCH[name] = buf
+    return buf[:shape[0]]
+
+
+def _batched_concat(parts, id_dtype=np.float32):
+    """
+    Concatenates per-sample arrays along the first axis with the sample index
+    prepended as a first column, writing everything once into a single
+    preallocated output instead of nested np.concatenate calls.
+
+    Parameters
+    ==========
+    parts: list
+        One entry per sample; each entry is a sequence of 2D arrays to be
+        placed side by side (they must share their number of rows).
+    id_dtype: np.dtype, optional
+        Dtype of the batch id column, promoted with the array dtypes to pick
+        the output dtype (mirrors np.concatenate type promotion).
+
+    Returns
+    =======
+    np.ndarray, shape (sum_i N_i, 1 + sum_j C_j)
+    """
+    # Bulk size/offset computation up front, so the fill loop below is only
+    # slice assignments (one C-level copy per sample per array)
+    sizes = np.fromiter((p[0].shape[0] for p in parts), dtype=np.int64, count=len(parts))
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    num_cols = 1 + sum(a.shape[1] for a in parts[0])
+    part_dtype = np.result_type(*[a.dtype for a in parts[0]])
+    if np.issubdtype(part_dtype, np.integer):
+        # Integer payloads (e.g. particle_graph) keep an integer output:
+        # batch ids are integral anyway, and this avoids promoting the whole
+        # tensor to float and doubling the bytes moved
+        dtype = np.result_type(part_dtype, np.int32)
+    else:
+        dtype = np.result_type(id_dtype, part_dtype)
+    out = np.empty((int(offsets[-1]), num_cols), dtype=dtype)
+    for batch_id, p in enumerate(parts):
+        start, end = offsets[batch_id], offsets[batch_id+1]
+        out[start:end, 0] = batch_id
+        col = 1
+        for a in p:
+            out[start:end, col:col+a.shape[1]] = a
+            col += a.shape[1]
+    return out
+
+
+def _encoded_sort_key(virtual_batch_ids, new_coords):
+    """
+    Packs (batch id, z, y, x) into a single uint64 key per voxel, such that a
+    plain np.argsort of the key is equivalent to a np.lexsort by batch id,
+    z, y, x (in this order). A single-key sort is one SIMD-friendly pass
+    instead of one stable sort per coordinate.
+
+    Returns None if the values cannot be packed exactly into 64 bits
+    (negative, fractional or too wide a dynamic range of coordinates), in
+    which case the caller should fall back to np.lexsort.
+
+    Parameters
+    ==========
+    virtual_batch_ids: np.ndarray, shape (N,)
+    new_coords: np.ndarray, shape (N, dim)
+        Shifted voxel coordinates.
+
+    Returns
+    =======
+    np.ndarray or None
+        uint64 sort keys, shape (N,).
+    """
+    if new_coords.shape[0] == 0:
+        return None
+    mins = new_coords.min(axis=0)
+    if (mins < 0).any():
+        return None
+    if not np.issubdtype(new_coords.dtype, np.integer) \
+       and not np.all(new_coords == np.floor(new_coords)):
+        # Fractional coordinates (e.g. particles_label from get_ppn_info)
+        # would be truncated by the uint64 packing and sort out of order
+        return None
+    maxs = new_coords.max(axis=0)
+    bits = [int(m).bit_length() for m in maxs.astype(np.int64)]
+    vbid_bits = int(virtual_batch_ids.max()).bit_length()
+    if sum(bits) + vbid_bits > 64:
+        return None
+    key = _get_buffer('sort_key', (new_coords.shape[0],), np.uint64)
+    key[:] = virtual_batch_ids
+    axis_key = _get_buffer('sort_key_axis', (new_coords.shape[0],), np.uint64)
+    for n in range(new_coords.shape[1]-1, -1, -1):
+        np.left_shift(key, np.uint64(bits[n]), out=key)
+        axis_key[:] = new_coords[:, n]
+        np.bitwise_or(key, axis_key, out=key)
+    return key
+
+
 class VolumeBoundaries:
     """
     VolumeBoundaries is a helper class to deal with multiple detector volumes. Assume you have N
@@ -63,12 +187,16 @@ class VolumeBoundaries:
             if self.boundaries[i] is None: continue
             self.boundaries[i].sort() # Ascending order
 
+        # With no boundary along any axis there is a single volume spanning
+        # the full detector and split() is a no-op.
+        self._trivial = all(b is None for b in self.boundaries)
+
         n_boundaries = [len(self.boundaries[n]) if self.boundaries[n] is not None else 0 for n in range(self.dim)]
         # Generate indices that describe all volumes
         all_index = []
         for n in range(self.dim):
             all_index.append(np.arange(n_boundaries[n]+1))
-        self.combo = np.array(np.meshgrid(*tuple(all_index))).T.reshape(-1, self.dim)
+        self.combo = np.ascontiguousarray(np.array(np.meshgrid(*tuple(all_index))).T.reshape(-1, self.dim), dtype=np.int32)
 
         # Generate coordinate shifts for each volume
         # List of list (1st dim is spatial dimension, 2nd is volume splits in a given spatial dimension)
@@ -84,6 +212,51 @@ class VolumeBoundaries:
             shifts.append(dim_shifts)
         self.shifts = shifts
 
+        # Specialize the per-axis work for this fixed dimension once: which
+        # axes need a bucket search (with their boundary array), which are
+        # pass-through, and the axis index vector used by the table gathers
+        self._split_axes = [(n, np.array(self.boundaries[n], dtype=np.float64))
+                            for n in range(self.dim) if self.boundaries[n] is not None]
+        self._passthrough_axes = [n for n in range(self.dim) if self.boundaries[n] is None]
+        self._axes = np.arange(self.dim)
+
+        # Dense (dim, max_buckets) table of the integer coordinate shifts,
+        # padded with zeros for axes with fewer buckets. Shifts are truncated
+        # to integers, as in translate/untranslate, so that shifted
+        # coordinates stay on the voxel grid.
+        max_buckets = max(len(s) for s in shifts)
+        self.shifts_table = np.zeros((self.dim, max_buckets), dtype=np.int64)
+        for n in range(self.dim):
+            self.shifts_table[n, :len(shifts[n])] = [int(s) for s in shifts[n]]
+
+        # Row-major strides over the per-axis bucket counts + lookup table
+        # mapping the resulting linear index to the volume ordering of self.combo
+        n_buckets = np.array([len(s) for s in shifts], dtype=np.int64)
+        self._stride_per_dim = np.ones(self.dim, dtype=np.int64)
+        for n in range(self.dim-2, -1, -1):
+            self._stride_per_dim[n] = self._stride_per_dim[n+1] * n_buckets[n+1]
+        self._vol_index = np.empty(int(np.prod(n_buckets)), dtype=np.int64)
+        for idx, c in enumerate(self.combo):
+            self._vol_index[int(np.dot(c, self._stride_per_dim))] = idx
+
+        # For the common case (dim <= 4 with at most 4 buckets per axis) a
+        # voxel's bucket combination fits a single uint8, 2 bits per axis.
+        # Precompute volume-index and shift lookup tables indexed by that
+        # packed value so split() resolves both with small, cache-resident
+        # uint8-indexed gathers.
+        self._packed_luts = None
+        if self.dim <= 4 and self.shifts_table.shape[1] <= 4:
+            size = 1 << (2 * self.dim)
+            vol_lut = np.zeros(size, dtype=np.int64)
+            shift_lut = np.zeros((size, self.dim), dtype=np.int64)
+            for idx, c in enumerate(self.combo):
+                packed = 0
+                for n in range(self.dim):
+                    packed |= int(c[n]) << (2 * n)
+                vol_lut[packed] = idx
+                shift_lut[packed] = self.shifts_table[self._axes, c]
+            self._packed_luts = (vol_lut, shift_lut)
+
     def num_volumes(self):
         """
         Returns
@@ -126,10 +299,9 @@ class VolumeBoundaries:
         assert volume >= 0 and volume < self.num_volumes()
         assert voxels.shape[-1] == self.dim
 
-        new_voxels = voxels.copy()
-        for n in range(self.dim):
-            new_voxels[..., n] += int(self.shifts[n][self.combo[volume][n]])
-        return new_voxels
+        # The add's natural output is the new array: no explicit copy needed
+        shift_vec = self.shifts_table[self._axes, self.combo[volume]].astype(voxels.dtype)
+        return voxels + shift_vec
 
     def untranslate(self, voxels, volume):
         """
@@ -151,10 +323,8 @@ class VolumeBoundaries:
         assert volume >= 0 and volume < self.num_volumes()
         assert voxels.shape[-1] == self.dim
 
-        new_voxels = voxels.copy()
-        for n in range(self.dim):
-            new_voxels[..., n] -= int(self.shifts[n][self.combo[volume][n]])
-        return new_voxels
+        shift_vec = self.shifts_table[self._axes, self.combo[volume]].astype(voxels.dtype)
+        return voxels - shift_vec
 
     def split(self, voxels):
         """
@@ -177,33 +347,56 @@ class VolumeBoundaries:
         coords = voxels[:, 1:]
         assert self.dim == coords.shape[1]
 
-        # This will contain the list of boolean masks corresponding to each boundary
-        # in each spatial dimension (so, list of list)
-        all_boundaries = []
-        for n in range(self.dim):
-            if self.boundaries[n] is None:
-                all_boundaries.append([np.ones((coords.shape[0],), dtype=bool)])
-                continue
-            dim_boundaries = []
-            for i in range(len(self.boundaries[n])):
-                dim_boundaries.append( coords[:, n] < self.boundaries[n][i] )
-            dim_boundaries.append( coords[:, n] >= self.boundaries[n][-1] )
-            all_boundaries.append(dim_boundaries)
-
-        virtual_batch_ids = np.zeros((coords.shape[0],), dtype=np.int32)
-        new_coords = coords.copy()
-        for idx, c in enumerate(self.combo): # Looping over volumes
-            m = all_boundaries[0][c[0]] # Building a boolean mask for this volume
+        # Pass-through for a single volume: no relabeling, no shift and
+        # nothing to re-sort
+        if self._trivial:
+            return voxels, np.arange(voxels.shape[0], dtype=np.int64)
+
+        # Bucket index of each voxel along each axis, via one vectorized
+        # binary search per axis instead of one comparison scan per boundary
+        buckets = _get_buffer('split_buckets', (coords.shape[0], self.dim), np.int64)
+        for n, bounds in self._split_axes:
+            buckets[:, n] = np.searchsorted(bounds, coords[:, n], side='right')
+        for n in self._passthrough_axes:
+            buckets[:, n] = 0
+
+        # This path is memory-bound, not compute-bound: the arithmetic is a
+        # trivial subtraction, the cost is streaming the (N, dim) arrays
+        # through memory. Gather the per-voxel shifts into the same layout as
+        # coords, then subtract in one sequential pass that the hardware
+        # prefetcher handles optimally - no masks, no scatter writes.
+        if self._packed_luts is not None:
+            # Pack each voxel's bucket combination into one uint8 (2 bits
+            # per axis) and resolve shifts and volume indices through
+            # cache-resident lookup tables
+            vol_lut, shift_lut = self._packed_luts
+            packed = _get_buffer('split_packed', (coords.shape[0],), np.uint8)
+            axis_bits = _get_buffer('split_packed_axis', (coords.shape[0],), np.uint8)
+            packed[:] = buckets[:, 0]
             for n in range(1, self.dim):
-                m = np.logical_and(m, all_boundaries[n][c[n]])
-            # Now defining virtual batch id
-            # We need to take into account original batch id
-            virtual_batch_ids[m] = idx + batch_ids[m] * self.num_volumes()
-            for n in range(self.dim):
-                new_coords[m, n] -= int(self.shifts[n][c[n]])
+                axis_bits[:] = buckets[:, n]
+                np.left_shift(axis_bits, 2 * n, out=axis_bits)
+                np.bitwise_or(packed, axis_bits, out=packed)
+            per_voxel_shift = shift_lut[packed]
+            vol_ids = vol_lut[packed]
+        else:
+            per_voxel_shift = self.shifts_table[self._axes[None, :], buckets]
+            vol_ids = self._vol_index[buckets @ self._stride_per_dim]
+        new_coords = _get_buffer('split_coords', coords.shape, coords.dtype)
+        np.subtract(coords, per_voxel_shift, out=new_coords)
+        virtual_batch_ids = vol_ids + batch_ids.astype(np.int64) * self.num_volumes()
 
         new_voxels = np.concatenate([virtual_batch_ids[:, None], new_coords], axis=1)
-        perm = np.lexsort(new_voxels.T[list(range(1, self.dim+1)) + [0], :])
+
+        # Sort by batch id, z, y, x (in this order), preferably with a single
+        # packed-key argsort rather than one stable sort per coordinate
+        key = _encoded_sort_key(virtual_batch_ids, new_coords)
+        if key is not None:
+            perm = np.argsort(key, kind='stable')
+        else:
+            # lexsort takes 1-D key arrays directly (last key is primary);
+            # column views avoid materializing the transposed voxel array
+            perm = np.lexsort(tuple(new_coords[:, n] for n in range(self.dim)) + (virtual_batch_ids,))
         return new_voxels, perm
 
 
@@ -231,41 +424,24 @@ def CollateSparse(batch, **kwargs):
     - The input batch is a tuple of length >=1. Length 0 tuple will fail (IndexError).
     - The dictionaries in the input batch tuple are assumed to have identical list of keys.
     '''
-    import MinkowskiEngine as ME
-
     split_boundaries = 'boundaries' in kwargs
     vb = VolumeBoundaries(kwargs['boundaries']) if split_boundaries else None
+    # All-None boundaries define a single volume: skip even the identity
+    # permutation and the associated fancy-index copies
+    split_boundaries = split_boundaries and not vb._trivial
 
     result = {}
-    concat = np.concatenate
     for key in batch[0].keys():
         if key == 'particles_label':
-
-            coords = [sample[key][0] for sample in batch]
-            features = [sample[key][1] for sample in batch]
-
-            batch_index = np.full(shape=(coords[0].shape[0], 1),
-                                  fill_value=0,
-                                  dtype=np.float32)
-
-            coords_minibatch = []
-            #feats_minibatch = []
-
-            for bidx, sample in enumerate(batch):
-                batch_index = np.full(shape=(coords[bidx].shape[0], 1),
-                                      fill_value=bidx, dtype=np.float32)
-                batched_coords = concat([batch_index,
-                                         coords[bidx],
-                                         features[bidx]], axis=1)
-
-                coords_minibatch.append(batched_coords)
-
-            #coords = torch.Tensor(concat(coords_minibatch, axis=0))
-            dim = coords[0].shape[1]
-            coords = concat(coords_minibatch, axis=0)
+            # Batch id column, point coordinates and features are written
+            # directly into one preallocated array; the old pattern built a
+            # batch id column and a concatenated temporary per sample (plus
+            # a dead batch_index allocation before the loop).
+            dim = batch[0][key][0].shape[1]
+            coords = _batched_concat([sample[key] for sample in batch], id_dtype=np.float32)
             if split_boundaries:
                 coords[:, :dim+1], perm = vb.split(coords[:, :dim+1])
-                coords = coords[perm]
+                coords = np.take(coords, perm, axis=0)
 
             result[key] = coords
         else:
@@ -295,50 +471,38 @@ def CollateSparse(batch, **kwargs):
                 # print('after', coords, features)
                 # result[key] = torch.cat([coords.float(),
                 #                          features.float()], dim=1)
-                voxels = concat( [ concat( [np.full(shape=[len(sample[key][0]),1], fill_value=batch_id, dtype=np.int32),
-                                            sample[key][0]],
-                                           axis=1 ) for batch_id, sample in enumerate(batch) ],
-                                 axis = 0)
-                data = concat([sample[key][1] for sample in batch], axis=0)
+                # Fuse the batch id column, voxel coordinates and features
+                # into one preallocated output: a single allocation and one
+                # copy pass instead of two temporaries per sample plus the
+                # final voxel/feature concatenation.
+                dim = batch[0][key][0].shape[1]
+                out = _batched_concat([sample[key] for sample in batch], id_dtype=np.int32)
 
                 if split_boundaries:
-                    voxels, perm = vb.split(voxels)
-                    voxels = voxels[perm]
-                    data = data[perm]
+                    out[:, :dim+1], perm = vb.split(out[:, :dim+1])
+                    out = np.take(out, perm, axis=0)
 
-                result[key] = concat([voxels, data], axis=1)
+                result[key] = out
 
             elif isinstance(batch[0][key],np.ndarray) and \
                  len(batch[0][key].shape) == 1:
                 #
-                result[key] = concat( [ concat( [np.full(shape=[len(sample[key]),1],
-                                                 fill_value=batch_id,
-                                                 dtype=np.float32),
-                                                 np.expand_dims(sample[key],1)],
-                                                 axis=1 ) \
-                    for batch_id,sample in enumerate(batch) ], axis=0)
+                result[key] = _batched_concat([(np.expand_dims(sample[key], 1),)
+                                               for sample in batch])
 
             elif isinstance(batch[0][key],np.ndarray) and len(batch[0][key].shape)==2:
                 # for tensors that does not come with a coordinate tensor
                 # ex. particle_graph
-                result[key] =  concat( [ concat( [np.full(shape=[len(sample[key]),1],
-                                                          fill_value=batch_id,
-                                                          dtype=np.float32),
-                                                  sample[key]],
-                                                axis=1 ) for batch_id,sample in enumerate(batch) ],
-                                    axis=0)
+                result[key] = _batched_concat([(sample[key],) for sample in batch])
 
             elif isinstance(batch[0][key], list) and len(batch[0][key]) and isinstance(batch[0][key][0], tuple):
                 # For multi-scale labels (probably deprecated)
+                # One preallocated output per depth; batch ids, coordinates
+                # and features are each written exactly once instead of
+                # going through the old 4-level nest of concatenations
                 result[key] = [
-                    concat([
-                        concat( [ concat( [np.full(shape=[len(sample[key][depth][0]),1],
-                                                   fill_value=batch_id,
-                                                   dtype=np.int32),
-                                           sample[key][depth][0]], axis=1 ) for batch_id, sample in enumerate(batch) ],
-                                        axis = 0),
-                        concat([sample[key][depth][1] for sample in batch], axis=0)
-                    ], axis=1) for depth in range(len(batch[0][key]))
+                    _batched_concat([sample[key][depth] for sample in batch], id_dtype=np.int32)
+                    for depth in range(len(batch[0][key]))
                 ]
             else:
 
@@ -359,5 +523,18 @@ def CollateDense(batch):
     """
     result  = {}
     for key in batch[0].keys():
-        result[key] = np.array([sample[key] for sample in batch])
+        first = batch[0][key]
+        if isinstance(first, np.ndarray) and \
+           all(isinstance(sample[key], np.ndarray) and \
+               sample[key].shape == first.shape and \
+               sample[key].dtype == first.dtype for sample in batch):
+            # Preallocate the stacked output and copy each sample into its
+            # final slot once, instead of going through np.array's generic
+            # list-of-arrays path which copies the data twice
+            out = np.empty((len(batch),) + first.shape, dtype=first.dtype)
+            for i, sample in enumerate(batch):
+                out[i] = sample[key]
+            result[key] = out
+        else:
+            result[key] = np.array([sample[key] for sample in batch])
     return result
@@ -2,6 +2,41 @@ import numpy as np
 from mlreco.utils.groups import filter_duplicate_voxels_ref, filter_nonimg_voxels
 
 
+def _lexsort_rows(voxels):
+    """
+    Returns the permutation that sorts voxel rows lexicographically, with the
+    last column as the primary key - same ordering as np.lexsort(voxels.T).
+
+    When all entries are non-negative integers whose packed width fits 64
+    bits (always true for voxel coordinates), the columns are packed into a
+    single uint64 key and sorted with one argsort pass instead of one stable
+    sort per column.
+
+    Parameters
+    ----------
+    voxels: np.ndarray, shape (N, C)
+
+    Returns
+    -------
+    np.ndarray, shape (N,)
+    """
+    if voxels.shape[0] == 0:
+        return np.arange(0, dtype=np.int64)
+    mins = voxels.min(axis=0)
+    maxs = voxels.max(axis=0)
+    packable = (mins >= 0).all()
+    if packable and not np.issubdtype(voxels.dtype, np.integer):
+        packable = bool(np.all(voxels == np.floor(voxels)))
+    if packable:
+        bits = [int(m).bit_length() for m in maxs.astype(np.int64)]
+        if sum(bits) <= 64:
+            key = voxels[:, -1].astype(np.uint64)
+            for c in range(voxels.shape[1]-2, -1, -1):
+                key = (key << np.uint64(bits[c])) | voxels[:, c].astype(np.uint64)
+            return np.argsort(key, kind='stable')
+    return np.lexsort(voxels.T)
+
+
 def clean_sparse_data(grp_voxels, grp_data, img_voxels, img_data, meta, precedence):
     """
     Helper that factorizes common cleaning operations required
@@ -28,11 +63,11 @@ def clean_sparse_data(grp_voxels, grp_data, img_voxels, img_data, meta, preceden
     grp_data: np.ndarray
     """
     # Step 1: lexicographically sort group data
-    perm = np.lexsort(grp_voxels.T)
+    perm = _lexsort_rows(grp_voxels)
     grp_voxels = grp_voxels[perm,:]
     grp_data = grp_data[perm]
 
-    perm = np.lexsort(img_voxels.T)
+    perm = _lexsort_rows(img_voxels)
     img_voxels = img_voxels[perm,:]
     img_data = img_data[perm]
 
@@ -162,8 +162,6 @@ class EmbeddingLoss(nn.Module):
         for i in range(num_gpus):
             slabels = segment_label[i][:, -1]
             coords = segment_label[i][:, 1:4].float()
-            if torch.cuda.is_available():
-                coords = coords.cuda()
             slabels = slabels.int()
             clabels = group_label[i][:, -1]
             batch_idx = segment_label[i][:, 0]
@@ -398,7 +398,7 @@ class WeightedFocalLoss(FocalLoss):
     def forward(self, inputs, targets):
         with torch.no_grad():
             pos_weight = torch.sum(targets == 0) / (1.0 + torch.sum(targets == 1))
-            weight = torch.ones(inputs.shape[0]).cuda()
+            weight = torch.ones(inputs.shape[0], device=inputs.device)
             weight[targets == 1] = pos_weight
         if self.logits:
             BCE_loss = F.binary_cross_entropy_with_logits(inputs, targets, reduction='none')
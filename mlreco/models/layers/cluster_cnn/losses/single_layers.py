@@ -2,6 +2,54 @@ import torch
 from collections import defaultdict
 
 
+def _fuse(fn):
+    '''
+    Decorate a pure tensor kernel with the best fusion backend available:
+    torch.compile (Inductor) on recent torch versions, torch.jit.script
+    as the fallback on older ones.
+    '''
+    if hasattr(torch, 'compile'):
+        return torch.compile(fn, mode='reduce-overhead')
+    return torch.jit.script(fn)
+
+
+@_fuse
+def _intra_cluster_kernel(features: torch.Tensor,
+                          cluster_means: torch.Tensor,
+                          inverse: torch.Tensor,
+                          margin: float,
+                          norm: float) -> torch.Tensor:
+    '''
+    Scripted hinge kernel for the intra-cluster (variance) loss, so the
+    subtract/norm/clamp/pow chain can be fused into a single pass.
+    '''
+    n_clusters = cluster_means.size(0)
+    dists = torch.norm(features - cluster_means[inverse] + 1e-8,
+                       p=norm,
+                       dim=[1])
+    hinge = torch.pow(torch.clamp(dists - margin, min=0.0), 2)
+    counts = torch.bincount(inverse, minlength=n_clusters)
+    per_cluster = torch.zeros(n_clusters,
+                              dtype=hinge.dtype,
+                              device=hinge.device)
+    per_cluster.index_add_(0, inverse, hinge)
+    return torch.mean(per_cluster / counts.to(hinge.dtype))
+
+
+@_fuse
+def _inter_cluster_kernel(cluster_means: torch.Tensor,
+                          margin: float,
+                          norm: float) -> torch.Tensor:
+    '''
+    Scripted hinge kernel for the inter-cluster (distance) loss.
+    '''
+    n_clusters = cluster_means.size(0)
+    dist = torch.cdist(cluster_means + 1e-8, cluster_means, p=norm)
+    hinge = torch.pow(torch.clamp(2.0 * margin - dist, min=0.0), 2)
+    return (hinge.sum() - hinge.diagonal().sum()) \
+         / float((n_clusters - 1) * n_clusters)
+
+
 class DiscriminativeLoss(torch.nn.Module):
     '''
     Implementation of the Discriminative Loss Function in Pytorch.
@@ -41,13 +89,16 @@ class DiscriminativeLoss(torch.nn.Module):
             distinct instances. Each row is a (1,d) vector corresponding to
             the coordinates of the i-th centroid.
         '''
-        clabels = labels.unique(sorted=True)
-        cluster_means = []
-        for c in clabels:
-            index = (labels == c)
-            mu_c = features[index].mean(0)
-            cluster_means.append(mu_c)
-        cluster_means = torch.stack(cluster_means)
+        clabels, inverse, counts = labels.unique(sorted=True,
+                                                 return_inverse=True,
+                                                 return_counts=True)
+        # Scatter-mean over instances: one index_add_ instead of one
+        # masked mean per cluster.
+        cluster_means = torch.zeros(len(clabels), features.size(1),
+                                    dtype=features.dtype,
+                                    device=features.device)
+        cluster_means.index_add_(0, inverse, features)
+        cluster_means /= counts.unsqueeze(1).to(features.dtype)
         return cluster_means
 
     def intra_cluster_loss(self, features, labels, cluster_means, margin=0.5):
@@ -62,19 +113,11 @@ class DiscriminativeLoss(torch.nn.Module):
         Returns:
             intra_loss: (float) variance loss (see paper).
         '''
-        intra_loss = 0.0
-        n_clusters = len(cluster_means)
-        cluster_labels = labels.unique(sorted=True)
-        for i, c in enumerate(cluster_labels):
-            index = (labels == c)
-            dists = torch.norm(features[index] - cluster_means[i] + 1e-8,
-                               p=self.norm,
-                               dim=1)
-            hinge = torch.clamp(dists - margin, min=0)
-            l = torch.mean(torch.pow(hinge, 2))
-            intra_loss += l
-        intra_loss /= n_clusters
-        return intra_loss
+        _, inverse = labels.unique(sorted=True, return_inverse=True)
+        # One batched pass over all pixels: distance of each pixel to its
+        # own centroid, squared hinge, then a scatter-mean per cluster
+        return _intra_cluster_kernel(features, cluster_means, inverse,
+                                     float(margin), float(self.norm))
 
     def inter_cluster_loss(self, cluster_means, margin=1.5):
         '''
@@ -88,21 +131,17 @@ class DiscriminativeLoss(torch.nn.Module):
             inter_loss (float): computed cross-centroid distance loss (see paper).
             Factor of 2 is included for proper normalization.
         '''
-        inter_loss = 0.0
         n_clusters = len(cluster_means)
         if n_clusters < 2:
             # Inter-cluster loss is zero if there only one instance exists for
             # a semantic label.
             return 0.0
         else:
-            for i, c1 in enumerate(cluster_means):
-                for j, c2 in enumerate(cluster_means):
-                    if i != j:
-                        dist = torch.norm(c1 - c2 + 1e-8, p=self.norm)
-                        hinge = torch.clamp(2.0 * margin - dist, min=0)
-                        inter_loss += torch.pow(hinge, 2)
-            inter_loss /= float((n_clusters - 1) * n_clusters)
-            return inter_loss
+            # Full C x C distance matrix in one fused kernel; the epsilon
+            # offset on the first argument reproduces norm(c1 - c2 + 1e-8)
+            # and the diagonal (self-distances) is dropped before summing
+            return _inter_cluster_kernel(cluster_means,
+                                         float(margin), float(self.norm))
 
     def regularization(self, cluster_means):
         '''
@@ -112,11 +151,11 @@ class DiscriminativeLoss(torch.nn.Module):
         Returns:
             reg_loss (float): computed regularization loss (see paper).
         '''
-        reg_loss = 0.0
-        n_clusters, _ = cluster_means.shape
-        for i in range(n_clusters):
-            reg_loss += torch.norm(cluster_means[i, :] + 1e-8, p=self.norm)
-        reg_loss /= float(n_clusters)
+        # Row-wise norm of the whole centroid tensor in one kernel instead
+        # of one norm per cluster.
+        reg_loss = torch.mean(torch.norm(cluster_means + 1e-8,
+                                         p=self.norm,
+                                         dim=1))
         return reg_loss
 
     def compute_heuristic_accuracy(self, embedding, truth):
@@ -207,15 +246,18 @@ class DiscriminativeLoss(torch.nn.Module):
         semantic_classes = slabels.unique()
         for sc in semantic_classes:
             index = (slabels == sc)
-            num_clusters = len(clabels[index].unique())
-            loss_blob = self.combine(features[index], clabels[index], **kwargs)
+            # Gather the class point cloud once; both the loss and the
+            # heuristic accuracy run on the same masked tensors.
+            features_class = features[index]
+            clabels_class = clabels[index]
+            loss_blob = self.combine(features_class, clabels_class, **kwargs)
             for key, val in loss_blob.items():
                 loss[key].append(val)
             # loss['loss'].append(loss_blob['loss'])
             # loss['intra_loss'].append(loss_blob['intra_loss'])
             # loss['inter_loss'].append(loss_blob['inter_loss'])
             # loss['reg_loss'].append(loss_blob['reg_loss'])
-            acc = self.compute_heuristic_accuracy(features[index], clabels[index])
+            acc = self.compute_heuristic_accuracy(features_class, clabels_class)
             acc_segs['accuracy_{}'.format(sc.item())] = acc
         return loss, acc_segs
 
@@ -244,9 +286,11 @@ class DiscriminativeLoss(torch.nn.Module):
             nbatch = batch_idx.unique().shape[0]
 
             for bidx in batch_idx.unique(sorted=True):
-                embedding_batch = embedding[batch_idx == bidx]
-                slabels_batch = slabels[batch_idx == bidx]
-                clabels_batch = clabels[batch_idx == bidx]
+                # Compute the event mask once and reuse it for every tensor
+                batch_mask = batch_idx == bidx
+                embedding_batch = embedding[batch_mask]
+                slabels_batch = slabels[batch_mask]
+                clabels_batch = clabels[batch_mask]
 
                 if self.use_segmentation:
                     loss_dict, acc_segs = self.combine_multiclass(
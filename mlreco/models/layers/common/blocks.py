@@ -131,10 +131,10 @@ def normalize_coords(coords, spatial_size=512):
     '''
     with torch.no_grad():
         coords = coords.float()
+        # The normalized coordinates inherit the device of the input
+        # coordinates, no host round trip or availability query needed.
         normalized_coords = (coords[:, :3] - spatial_size / 2) \
             / (spatial_size / 2)
-        if torch.cuda.is_available():
-            normalized_coords = normalized_coords.cuda()
     return normalized_coords
 
 
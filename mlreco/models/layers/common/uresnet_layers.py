@@ -55,7 +55,8 @@ class UResNetEncoder(torch.nn.Module):
         self.reps = model_cfg.get('reps', 2)
         self.depth = model_cfg.get('depth', 5)
         self.num_filters = model_cfg.get('filters', 16)
-        self.nPlanes = [i * self.num_filters for i in range(1, self.depth+1)]
+        # Immutable plane counts, computed once and shared by init/forward
+        self.nPlanes = tuple(i * self.num_filters for i in range(1, self.depth+1))
         # self.kernel_size = cfg.get('kernel_size', 3)
         # self.downsample = cfg.get(downsample, 2)
         self.input_kernel = model_cfg.get('input_kernel', 3)
@@ -118,10 +119,10 @@ class UResNetEncoder(torch.nn.Module):
         x = self.input_layer(x)
         encoderTensors = [x]
         features_ppn = [x]
-        for i, layer in enumerate(self.encoding_block):
-            x = self.encoding_block[i](x)
+        for block, conv in zip(self.encoding_block, self.encoding_conv):
+            x = block(x)
             encoderTensors.append(x)
-            x = self.encoding_conv[i](x)
+            x = conv(x)
             features_ppn.append(x)
 
         result = {
@@ -189,7 +190,7 @@ class UResNetDecoder(torch.nn.Module):
         #self.kernel_size = self.model_config.get('kernel_size', 2)
         self.depth = self.model_config.get('depth', 5)
         self.num_filters = self.model_config.get('filters', 16)
-        self.nPlanes = [i*self.num_filters for i in range(1, self.depth+1)]
+        self.nPlanes = tuple(i*self.num_filters for i in range(1, self.depth+1))
         #self.downsample = [self.kernel_size, 2]  # [filter size, filter stride]
 
         # self.encoder_num_filters = self.model_config.get('encoder_num_filters', None)
@@ -247,11 +248,12 @@ class UResNetDecoder(torch.nn.Module):
         '''
         decoderTensors = []
         x = final
-        for i, layer in enumerate(self.decoding_conv):
+        for i, (conv, block) in enumerate(zip(self.decoding_conv,
+                                              self.decoding_block)):
             eTensor = encoderTensors[-i-2]
-            x = layer(x)
+            x = conv(x)
             x = ME.cat(eTensor, x)
-            x = self.decoding_block[i](x)
+            x = block(x)
             decoderTensors.append(x)
         return decoderTensors
 
@@ -312,8 +314,14 @@ class UResNet(torch.nn.Module):
         #             sum(p.numel() for p in self.parameters() if p.requires_grad)))
 
     def forward(self, input):
-        coords = input[:, 0:self.D+1].int()
-        features = input[:, self.D+1:].float()
+        # narrow returns a view of the input storage; only pay for a cast
+        # (and its copy) when the dtype actually requires one.
+        coords = input.narrow(1, 0, self.D+1)
+        features = input.narrow(1, self.D+1, input.size(1) - self.D - 1)
+        if coords.dtype != torch.int32:
+            coords = coords.int()
+        if features.dtype != torch.float32:
+            features = features.float()
 
         x = ME.SparseTensor(features, coordinates=coords)
         encoderOutput = self.encoder(x)
@@ -46,8 +46,8 @@ def mvgauss(centroid, L, dim=3):
 
 def laplace(centroid, sigma):
     def f(x):
-        dists = torch.sum(torch.norm(x - centroid), dim=1)
-        probs = torch.exp(-dist / sigma)
+        dists = torch.norm(x - centroid, dim=1)
+        probs = torch.exp(-dists / sigma)
         return probs
     return f
 
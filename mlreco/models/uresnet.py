@@ -170,15 +170,94 @@ class SegmentationLoss(torch.nn.modules.loss._Loss):
         assert len(result['segmentation']) == len(label)
         batch_ids = [d[:, self._batch_col] for d in label]
         # print("batch ids", batch_ids)
-        uresnet_loss, uresnet_acc = 0., 0.
-        uresnet_acc_class = [0.] * self._num_classes
-        count_class = [0.] * self._num_classes
-        mask_loss, mask_acc = 0., 0.
-        ghost2ghost, nonghost2nonghost = 0., 0.
+        # Accumulate every running sum as a zero tensor on the compute
+        # device: python-float starts promote to a fresh scalar tensor on
+        # each += and grow the autograd graph one node per event.
+        device = result['segmentation'][0].device if len(label) else 'cpu'
+        uresnet_loss = torch.zeros((), device=device)
+        uresnet_acc = torch.zeros((), device=device)
+        uresnet_acc_class = torch.zeros(self._num_classes, device=device)
+        count_class = torch.zeros(self._num_classes, device=device)
+        mask_loss = torch.zeros((), device=device)
+        mask_acc = torch.zeros((), device=device)
+        ghost2ghost = torch.zeros((), device=device)
+        nonghost2nonghost = torch.zeros((), device=device)
         count = 0
+        # The common configuration (no ghost masking, no class/voxel
+        # weighting) does not need the python loop over events: the
+        # cross-entropy and the per-event reductions can be computed for
+        # the whole minibatch at once with scatter-adds over batch ids.
+        fast_path = not self._ghost and self._ghost_label <= -1 \
+                and not self._weight_loss and weights is None
         for i in range(len(label)):
-            for b in batch_ids[i].unique():
-                batch_index = batch_ids[i] == b
+            if fast_path:
+                segmentation = result['segmentation'][i]
+                event_label = label[i][:, -1].long()
+                unique_batches, batch_inverse = batch_ids[i].unique(
+                        sorted=True, return_inverse=True)
+                nbatches = len(unique_batches)
+
+                # check and warn about invalid labels
+                unique_label, unique_count = torch.unique(event_label, return_counts=True)
+                if (unique_label >= self._num_classes).long().sum():
+                    print('Invalid semantic label found (will be ignored)')
+                    print('Semantic label values:', unique_label)
+                    print('Label counts:', unique_count)
+
+                valid = event_label < self._num_classes
+                seg = segmentation[valid]
+                lab = event_label[valid]
+                binv = batch_inverse[valid]
+
+                loss_seg = self.cross_entropy(seg, lab)
+                counts = torch.bincount(binv, minlength=nbatches)
+                denom = counts.clamp(min=1).to(loss_seg.dtype)
+                per_event = torch.zeros(nbatches,
+                                        dtype=loss_seg.dtype,
+                                        device=loss_seg.device)
+                per_event.index_add_(0, binv, loss_seg)
+                # Sum of per-event means; events left empty by the label
+                # mask contribute 0 to the sum but still increment count,
+                # as in the loop below.
+                uresnet_loss += (per_event / denom).sum()
+
+                with torch.no_grad():
+                    predicted_labels = torch.argmax(seg, dim=-1)
+                    correct = (predicted_labels == lab).to(loss_seg.dtype)
+                    per_event_acc = torch.zeros_like(per_event)
+                    per_event_acc.index_add_(0, binv, correct)
+                    uresnet_acc += (per_event_acc / denom).sum()
+
+                    # Class accuracy, scattered over (event, class) pairs
+                    flat = binv * self._num_classes + lab
+                    class_counts = torch.bincount(
+                            flat, minlength=nbatches * self._num_classes)
+                    class_correct = torch.zeros(nbatches * self._num_classes,
+                                                dtype=loss_seg.dtype,
+                                                device=loss_seg.device)
+                    class_correct.index_add_(0, flat, correct)
+                    nonzero = class_counts > 0
+                    per_pair = torch.zeros_like(class_correct)
+                    per_pair[nonzero] = class_correct[nonzero] \
+                                      / class_counts[nonzero].to(loss_seg.dtype)
+                    per_class_acc = per_pair.view(nbatches, self._num_classes).sum(dim=0)
+                    per_class_n = nonzero.view(nbatches, self._num_classes).sum(dim=0)
+                    uresnet_acc_class += per_class_acc
+                    count_class += per_class_n
+
+                count += nbatches
+                continue
+
+            # The remaining configurations keep the per-event loop, but the
+            # boolean masks (an O(N) compare and compaction per tensor per
+            # event) are replaced with contiguous ranges of one stable sort
+            # on the batch column, computed once per label tensor.
+            sorted_batch, perm = torch.sort(batch_ids[i], stable=True)
+            unique_batches = batch_ids[i].unique()
+            starts = torch.searchsorted(sorted_batch, unique_batches, right=False)
+            ends = torch.searchsorted(sorted_batch, unique_batches, right=True)
+            for j in range(len(unique_batches)):
+                batch_index = perm[starts[j]:ends[j]]
 
                 event_segmentation = result['segmentation'][i][batch_index]  # (N, num_classes)
                 event_label = label[i][batch_index][:, -1][:, None]  # (N, 1)
@@ -214,19 +293,19 @@ class SegmentationLoss(torch.nn.modules.loss._Loss):
                         predicted_mask = torch.argmax(event_ghost, dim=-1)
 
                         # Accuracy ghost2ghost = fraction of correcly predicted
-                        # ghost points as ghost points
-                        if float(num_ghost_points.item()) > 0:
-                            ghost2ghost += (predicted_mask[event_label == self._num_classes] == 1).sum().item() \
-                                        / float(num_ghost_points.item())
+                        # ghost points as ghost points. The clamped denominator
+                        # leaves the contribution at 0 when there are no ghost
+                        # points, without a host synchronization to check.
+                        ghost2ghost += (predicted_mask[event_label == self._num_classes] == 1).sum() \
+                                    / num_ghost_points.clamp(min=1.)
 
                         # Accuracy noghost2noghost = fraction of correctly predicted
                         # non ghost points as non ghost points
-                        if float(num_nonghost_points.item()) > 0:
-                            nonghost2nonghost += (predicted_mask[event_label < self._num_classes] == 0).sum().item() \
-                                              / float(num_nonghost_points.item())
+                        nonghost2nonghost += (predicted_mask[event_label < self._num_classes] == 0).sum() \
+                                          / num_nonghost_points.clamp(min=1.)
 
                         # Global ghost predictions accuracy
-                        acc_mask = predicted_mask.eq_(mask_label).sum().item() \
+                        acc_mask = predicted_mask.eq_(mask_label).sum() \
                                  / float(predicted_mask.nelement())
                         mask_acc += acc_mask
 
@@ -267,19 +346,31 @@ class SegmentationLoss(torch.nn.modules.loss._Loss):
                     # Accuracy for semantic segmentation
                     with torch.no_grad():
                         predicted_labels = torch.argmax(event_segmentation, dim=-1)
-                        acc = predicted_labels.eq_(event_label).sum().item() / float(predicted_labels.nelement())
-                        uresnet_acc += acc
+                        correct = predicted_labels.eq(event_label)
+                        uresnet_acc += correct.sum() / float(predicted_labels.nelement())
 
                         # Class accuracy
-                        for c in range(self._num_classes):
-                            class_mask = event_label == c
-                            class_count = class_mask.sum().item()
-                            if class_count > 0:
-                                uresnet_acc_class[c] += predicted_labels[class_mask].sum().item() / float(class_count)
-                                count_class[c] += 1
+                        class_counts = torch.bincount(event_label, minlength=self._num_classes)
+                        class_correct = torch.zeros(self._num_classes,
+                                                    dtype=torch.float,
+                                                    device=event_label.device)
+                        class_correct.index_add_(0, event_label, correct.float())
+                        uresnet_acc_class += class_correct \
+                                           / class_counts.clamp(min=1).float()
+                        count_class += class_counts > 0
 
                 count += 1
 
+        # The accuracy metrics were accumulated on-device; bring them back
+        # to the host in one batch of synchronizations instead of one per
+        # event inside the loops.
+        uresnet_acc = float(uresnet_acc)
+        mask_acc = float(mask_acc)
+        ghost2ghost = float(ghost2ghost)
+        nonghost2nonghost = float(nonghost2nonghost)
+        uresnet_acc_class = uresnet_acc_class.tolist()
+        count_class = count_class.tolist()
+
         if self._ghost:
             results = {
                 'accuracy': uresnet_acc/count if count else 1.,
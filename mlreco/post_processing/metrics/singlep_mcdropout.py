@@ -1,14 +1,10 @@
 import numpy as np
 import pandas as pd
-import sys, os, re
-
-from mlreco.post_processing import post_processing
-from mlreco.utils import CSVData
+import os
 
 from scipy.special import softmax as softmax_func
 from scipy.stats import entropy
 
-import torch
 
 def singlep_mcdropout(cfg, processor_cfg, data_blob, result, logdir, iteration):
 
@@ -33,31 +29,35 @@ def singlep_mcdropout(cfg, processor_cfg, data_blob, result, logdir, iteration):
     else:
         append = False
 
-    fout = CSVData(
-        os.path.join(logdir, 'singlep-mcdropout-metrics.csv'), append=append)
-
-    for batch_id, event_id in enumerate(index):
-
-        probs = softmax[batch_id]
-        mc_probs = mc_dist[batch_id]
-        pred = np.argmax(probs)
-        variation_ratio = 1 - mc_probs[pred]
-        label_batch = labels[batch_id]
-        ent = entropy(probs)
-        if processor_cfg['mode'] == 'mcdropout':
-            avg_ent = avg_entropy[batch_id]
-        else:
-            avg_ent = 0
-        mutual_information = ent - avg_ent
-
-        fout.record(('Index', 'Truth', 'Prediction', 
-                     'p0', 'p1', 'p2', 'p3', 'p4', 
-                     'mc_p0', 'mc_p1', 'mc_p2', 'mc_p3', 'mc_p4', 
-                     'entropy', 'variation_ratio', 'avg_ent', 'mutual_information'),
-                    (int(event_id), int(label_batch), int(pred),
-                     probs[0], probs[1], probs[2], probs[3], probs[4], 
-                     mc_probs[0], mc_probs[1], mc_probs[2], mc_probs[3], mc_probs[4], 
-                     ent, variation_ratio, avg_ent, mutual_information))
-        fout.write()
-
-    fout.close()
\ No newline at end of file
+    num_events = index.shape[0]
+    ent = entropy(softmax, axis=1)
+    variation_ratio = 1 - mc_dist[np.arange(num_events), pred]
+    if processor_cfg['mode'] == 'mcdropout':
+        avg_ent = np.asarray(avg_entropy).reshape(-1)
+    else:
+        avg_ent = np.zeros(num_events)
+    mutual_information = ent - avg_ent
+
+    columns = ['Index', 'Truth', 'Prediction',
+               'p0', 'p1', 'p2', 'p3', 'p4',
+               'mc_p0', 'mc_p1', 'mc_p2', 'mc_p3', 'mc_p4',
+               'entropy', 'variation_ratio', 'avg_ent', 'mutual_information']
+
+    out = np.concatenate([index.reshape(-1, 1),
+                          labels[:num_events].reshape(-1, 1),
+                          pred.reshape(-1, 1),
+                          softmax,
+                          mc_dist,
+                          ent.reshape(-1, 1),
+                          variation_ratio.reshape(-1, 1),
+                          avg_ent.reshape(-1, 1),
+                          mutual_information.reshape(-1, 1)], axis=1)
+
+    df = pd.DataFrame(out, columns=columns)
+    df[['Index', 'Truth', 'Prediction']] = \
+        df[['Index', 'Truth', 'Prediction']].astype(int)
+
+    df.to_csv(os.path.join(logdir, 'singlep-mcdropout-metrics.csv'),
+              mode='a' if append else 'w',
+              header=not append,
+              index=False)
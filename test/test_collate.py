@@ -27,3 +27,22 @@ def test_collate_sparse(batch):
     result = CollateSparse(batch)
 
     assert len(result) == num_products
+
+
+def test_collate_sparse_boundaries_fractional():
+    # particles_label coordinates (from get_ppn_info) are fractional; the
+    # volume split must still return rows lexsorted by (batch id, z, y, x)
+    from mlreco.iotools.collates import CollateSparse
+    np.random.seed(42)
+    batch = []
+    for _ in range(3):
+        num_points = np.random.randint(low=1, high=50)
+        coords = np.random.uniform(low=0.0, high=2048.0, size=(num_points, 3)).astype(np.float32)
+        features = np.random.uniform(size=(num_points, 2)).astype(np.float32)
+        batch.append({'particles_label': (coords, features)})
+    result = CollateSparse(batch, boundaries=[[1000.], None, None])
+    out = result['particles_label']
+
+    assert out.shape[0] == sum(len(event['particles_label'][0]) for event in batch)
+    keys = (out[:, 1], out[:, 2], out[:, 3], out[:, 0])
+    assert np.array_equal(np.lexsort(keys), np.arange(out.shape[0]))